@@ -4,29 +4,78 @@ FastAPI server for querying a BM25S index (DSA / Das Schwarze Auge).
 
 - Expects an index directory that contains the BM25S files AND a sidecar meta.jsonl
   with one JSON object per document (same order or with integer 'doc_id').
-- Returns RAW search results: for each hit you get {doc_index, score, meta}
+- Returns RAW search results: for each hit you get
+  {doc_index, score, entity_name, description, facts, extra}, where `extra` holds
+  any other keys of the meta doc (unformatted).
 
 Install:
-    pip install fastapi uvicorn bm25s pydantic
+    pip install fastapi uvicorn bm25s pydantic orjson cachetools
+    pip install numba  # optional: JIT scorer + top-k selection (~2x queries/sec)
 
 Run:
     python dsa_bm25_server.py
-    # or: uvicorn dsa_bm25_server:app --host 0.0.0.0 --port 8022
+    # or: uvicorn dsa_bm25_server:app --host 0.0.0.0 --port 8022 --no-access-log
+
+    # production, one worker per core share (see Procfile; needs `pip install gunicorn`):
+    gunicorn dsa_bm25_server:app -k uvicorn.workers.UvicornWorker \
+      -w $((2*$(nproc)+1)) --preload -b 0.0.0.0:8022
+    # --preload loads the index once in the parent; workers inherit it on fork, and
+    # with MMAP_INDEX=1 (default) the posting arrays are shared via the page cache.
+    # META_MMAP=1 does the same for meta.jsonl: only hits are decoded (LRU-cached),
+    # using a record offset index (meta.offs.npy / meta.lens.npy) built on first start
+    # and rebuilt whenever meta.jsonl's size or mtime changes.
 
 Query (example):
     curl -s -X POST "http://SERVER_OR_IP:8022/search" \
       -H "Content-Type: application/json" \
       -d "{\"query\":\"Horasischer Adel und Titel\",\"topk\":10,\"stopwords\":\"de\"}" | jq
+
+    # several queries scored in one pass:
+    curl -s -X POST "http://SERVER_OR_IP:8022/search_batch" \
+      -H "Content-Type: application/json" \
+      -d "{\"queries\":[\"Horasischer Adel\",\"Rondra-Geweihte\"],\"topk\":5}" | jq
+
+Concurrent single-query /search calls are coalesced server-side: while every scoring
+thread is busy, queued calls are collected into one batched retrieve (up to MAX_BATCH).
+Repeated /search calls are answered from an in-process TTL cache; responses carry a
+weak ETag, and a matching If-None-Match header gets an empty 304. /search is POST only
+to carry a JSON body -- it is a read-only lookup, so it honours If-None-Match like a GET
+would; clients that don't send the header always get the full 200.
 """
 
+import io
 import os
-import json
+import sys
+import mmap
+import ctypes
+import warnings
+import asyncio
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from functools import lru_cache
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
+
+# Must be set before numpy is imported. Concurrency comes from the executor (and from
+# gunicorn workers), so nested BLAS thread pools would only oversubscribe the cores.
+os.environ.setdefault("OPENBLAS_NUM_THREADS", "1")
+os.environ.setdefault("MKL_NUM_THREADS", "1")
 
 import bm25s  # pip install bm25s
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
+from bm25s.tokenization import Tokenizer
+import numpy as np
+import orjson  # pip install orjson
+from cachetools import TTLCache  # pip install cachetools
+from fastapi import FastAPI, HTTPException, Request, Response
+from fastapi.middleware.gzip import GZipMiddleware
+from pydantic import BaseModel, Field
+
+try:
+    import numba  # noqa: F401  (optional, enables the bm25s JIT backend)
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
 
 # -----------------------
 # Config (env overridable)
@@ -34,6 +83,19 @@ from pydantic import BaseModel
 INDEX_DIR = os.environ.get("INDEX_DIR", "bm25_index")
 DEFAULT_STOPWORDS = os.environ.get("STOPWORDS", None)  # e.g., "de"
 PORT = int(os.environ.get("PORT", "8022"))
+MAX_BATCH = int(os.environ.get("MAX_BATCH", "32"))  # /search coalescing
+EXEC_WORKERS = int(os.environ.get("EXEC_WORKERS", str(os.cpu_count() or 1)))
+RESPONSE_CACHE_MB = float(os.environ.get("RESPONSE_CACHE_MB", "64"))  # /search bodies, per worker
+RESPONSE_CACHE_TTL = float(os.environ.get("RESPONSE_CACHE_TTL", "300"))  # seconds
+MAX_TOPK = int(os.environ.get("MAX_TOPK", "1000"))  # upper bound for request topk
+MAX_QUERIES = int(os.environ.get("MAX_QUERIES", "256"))  # upper bound per /search_batch
+TOKEN_CACHE_SIZE = int(os.environ.get("TOKEN_CACHE_SIZE", "4096"))  # tokenized queries
+MMAP_INDEX = os.environ.get("MMAP_INDEX", "1") == "1"  # memory-map posting arrays
+MLOCK_INDEX = os.environ.get("MLOCK_INDEX", "0") == "1"  # pin posting arrays in RAM
+USE_MAXSCORE = os.environ.get("MAXSCORE", "0") == "1"  # MaxScore pruning for small topk
+META_MMAP = os.environ.get("META_MMAP", "0") == "1"  # decode meta lazily from disk
+META_CACHE_SIZE = int(os.environ.get("META_CACHE_SIZE", "4096"))  # decoded hot docs
+BACKEND_SELECTION = "numba" if HAS_NUMBA else "auto"
 
 # -----------------------
 # Load index + metadata
@@ -47,34 +109,480 @@ if not index_path.exists():
 if not meta_path.exists():
     raise RuntimeError(f"Missing sidecar meta.jsonl: {meta_path.resolve()}")
 
-# Load meta.jsonl
-metas: List[Dict[str, Any]] = []
-with meta_path.open("r", encoding="utf-8") as f:
-    for line in f:
-        line = line.strip()
-        if line:
-            metas.append(json.loads(line))
+META_FIELDS = ("entity_name", "description", "facts")
+MetaRecord = Tuple[Optional[str], Optional[str], Any, Dict[str, Any]]
+
 
-# If meta has integer 'doc_id', sort by it to align with index order.
-if metas and isinstance(metas[0], dict) and "doc_id" in metas[0]:
+def _doc_order(doc_ids: List[Any]) -> Optional[np.ndarray]:
+    """Permutation sorting records by integer 'doc_id', or None to keep file order."""
+    if not doc_ids or doc_ids[0] is None:
+        return None
     try:
-        metas.sort(key=lambda m: int(m["doc_id"]))
+        ids = np.fromiter((int(i) for i in doc_ids), dtype=np.int64, count=len(doc_ids))
     except Exception:
         # Fallback: keep file order
-        pass
+        return None
+    if np.all(ids[1:] >= ids[:-1]):
+        # Written in doc_id order already (the usual case): skip the sort and gather
+        return None
+    return np.argsort(ids, kind="stable")
+
+
+def _split_meta(m: Any) -> MetaRecord:
+    """(entity_name, description, facts, extra) of one meta doc, strings interned."""
+    if not isinstance(m, dict):
+        m = {}
+    name = m.get("entity_name")
+    doc_facts = m.get("facts", [])
+    for fact in doc_facts if isinstance(doc_facts, list) else ():
+        if isinstance(fact, dict) and isinstance(fact.get("source"), str):
+            fact["source"] = sys.intern(fact["source"])
+    return (
+        sys.intern(name) if isinstance(name, str) else name,
+        m.get("description"),
+        doc_facts,
+        {k: v for k, v in m.items() if k not in META_FIELDS},  # e.g. doc_id / type
+    )
+
+
+def _meta_doc_id(m: Any) -> Any:
+    return m.get("doc_id") if isinstance(m, dict) else None
+
+
+def _replace_file(path: Path, data: bytes) -> None:
+    """Write via a same-directory temp file + rename, so concurrently starting workers
+    (no --preload) never see a truncated sidecar."""
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    try:
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+    finally:
+        tmp.unlink(missing_ok=True)
+
+
+def _npy_bytes(arr: np.ndarray) -> bytes:
+    buf = io.BytesIO()
+    np.save(buf, arr)
+    return buf.getvalue()
+
+
+if META_MMAP:
+    # Keep meta.jsonl on disk and decode only the hits. Byte offsets / lengths of the
+    # records (in doc_id order) are built once and stored next to meta.jsonl, with a
+    # stamp of the meta.jsonl they describe (size + mtime) written last.
+    offs_path = index_path / "meta.offs.npy"
+    lens_path = index_path / "meta.lens.npy"
+    stamp_path = index_path / "meta.offs.json"
+    meta_st = meta_path.stat()
+    meta_stamp = {"size": meta_st.st_size, "mtime_ns": meta_st.st_mtime_ns}
+
+    meta_offs = meta_lens = None
+    try:
+        if orjson.loads(stamp_path.read_bytes()) == meta_stamp:
+            meta_offs = np.load(offs_path)
+            meta_lens = np.load(lens_path)
+            if len(meta_offs) != len(meta_lens) or (
+                len(meta_offs) and int((meta_offs + meta_lens).max()) > meta_st.st_size
+            ):
+                meta_offs = meta_lens = None  # inconsistent sidecar: rebuild
+    except (OSError, ValueError, EOFError):
+        meta_offs = meta_lens = None  # missing / damaged sidecar: rebuild
+
+    if meta_offs is None:
+        offs: List[int] = []
+        lens: List[int] = []
+        doc_ids: List[Any] = []
+        pos = 0
+        with meta_path.open("rb") as f:
+            for line in f:
+                if not line.isspace():
+                    offs.append(pos)
+                    lens.append(len(line))
+                    doc_ids.append(_meta_doc_id(orjson.loads(line)))
+                pos += len(line)
+        meta_offs = np.asarray(offs, dtype=np.int64)
+        meta_lens = np.asarray(lens, dtype=np.int64)
+        order = _doc_order(doc_ids)
+        if order is not None:
+            meta_offs, meta_lens = meta_offs[order], meta_lens[order]
+        try:
+            stamp_path.unlink(missing_ok=True)
+            _replace_file(offs_path, _npy_bytes(meta_offs))
+            _replace_file(lens_path, _npy_bytes(meta_lens))
+            _replace_file(stamp_path, orjson.dumps(meta_stamp))
+        except OSError:
+            pass  # read-only index dir: rebuild on next start
+
+    n_docs = len(meta_offs)
+    meta_file = meta_path.open("rb")
+    meta_mm = mmap.mmap(meta_file.fileno(), 0, access=mmap.ACCESS_READ) if n_docs else None
+
+    @lru_cache(maxsize=META_CACHE_SIZE)
+    def meta_record(di: int) -> MetaRecord:
+        start = int(meta_offs[di])
+        return _split_meta(orjson.loads(meta_mm[start:start + int(meta_lens[di])]))
+
+else:
+    # Load meta.jsonl (count lines first so the list is allocated once)
+    with meta_path.open("rb") as f:
+        n_lines = sum(1 for _ in f)
+
+    metas: List[Dict[str, Any]] = [None] * n_lines
+    n_metas = 0
+    with meta_path.open("rb") as f:
+        for line in f:
+            if line.isspace():
+                continue
+            metas[n_metas] = orjson.loads(line)
+            n_metas += 1
+    del metas[n_metas:]
+
+    # If meta has integer 'doc_id', sort by it to align with index order.
+    order = _doc_order([_meta_doc_id(m) for m in metas])
+    if order is not None:
+        metas = [metas[i] for i in order.tolist()]
+
+    # Split metas into parallel per-field lists (struct-of-arrays) indexed by doc_index:
+    # no per-document dict for the hot fields, and repeated strings are stored once.
+    entity_names: List[Optional[str]] = []
+    descriptions: List[Optional[str]] = []
+    facts: List[Any] = []
+    extras: List[Dict[str, Any]] = []  # any remaining keys
+    for m in metas:
+        name, description, doc_facts, extra = _split_meta(m)
+        entity_names.append(name)
+        descriptions.append(description)
+        facts.append(doc_facts)
+        extras.append(extra)
+
+    n_docs = len(metas)
+    del metas
+
+    def meta_record(di: int) -> MetaRecord:
+        return entity_names[di], descriptions[di], facts[di], extras[di]
 
 # Load BM25 retriever (we assume the index was built without storing the corpus)
-retriever = bm25s.BM25.load(str(index_path), load_corpus=False)
+retriever = bm25s.BM25.load(str(index_path), load_corpus=False, mmap=MMAP_INDEX)
+# bm25s needs k <= its own corpus size, which can differ from the meta.jsonl count
+index_docs = int(retriever.scores["num_docs"])
+
+
+def _tune_postings(scores: Dict[str, Any]) -> None:
+    """float32 score payload (scoring is memory-bound) and resident posting arrays."""
+    if scores["data"].dtype == np.float64:
+        # copies into RAM (also when memory-mapped), but halves the bytes streamed per query
+        scores["data"] = scores["data"].astype(np.float32)
+        retriever.dtype = "float32"
+    for name in ("data", "indices", "indptr"):
+        arr = scores[name]
+        mm = getattr(arr, "_mmap", None)  # set on np.memmap (MMAP_INDEX=1)
+        if mm is not None and hasattr(mmap, "MADV_WILLNEED"):
+            mm.madvise(mmap.MADV_WILLNEED)  # prefetch now rather than fault in per query
+        if MLOCK_INDEX and arr.nbytes:
+            libc = ctypes.CDLL(None, use_errno=True)
+            if libc.mlock(ctypes.c_void_p(arr.ctypes.data), ctypes.c_size_t(arr.nbytes)) != 0:
+                warnings.warn(
+                    f"mlock of posting array '{name}' failed: {os.strerror(ctypes.get_errno())}"
+                    " (check `ulimit -l`)"
+                )
+
+
+_tune_postings(retriever.scores)
+
+
+def _term_ceilings(scores: Dict[str, Any]) -> np.ndarray:
+    """Highest score each term contributes to any document (0 for empty postings)."""
+    data, indptr = scores["data"], np.asarray(scores["indptr"])
+    ceilings = np.zeros(len(indptr) - 1, dtype=data.dtype)
+    nonempty = np.diff(indptr) > 0
+    # empty columns have zero length, so consecutive non-empty starts delimit each column
+    ceilings[nonempty] = np.maximum.reduceat(data, indptr[:-1][nonempty])
+    return ceilings
+
+
+term_max = _term_ceilings(retriever.scores) if USE_MAXSCORE else None
+if HAS_NUMBA:
+    retriever.activate_numba_scorer()
 
 # -----------------------
 # API
 # -----------------------
-app = FastAPI(title="DSA BM25 API", version="1.0.0")
+# Bounded pool for the CPU-bound scoring, separate from the anyio threadpool that
+# serves sync endpoints. Concurrency comes from here, so each retrieve runs sequentially
+# (n_threads=0; bm25s would start a fresh one-thread pool per call for n_threads=1).
+EXEC = ThreadPoolExecutor(max_workers=EXEC_WORKERS, thread_name_prefix="bm25")
+
+
+def retrieve_maxscore(token_ids: List[int], k: int):
+    """Exact top-k of one query with MaxScore pruning; returns (docs, scores) of shape (k,).
+
+    Terms are added in descending order of their score ceiling. Once the running k-th
+    best score exceeds the summed ceilings of the terms still to come, no document
+    outside the current candidates can reach the top-k, so the remaining posting lists
+    are only probed for those candidates (binary search; bm25s writes doc-sorted postings).
+    """
+    data, indices, indptr = (retriever.scores[n] for n in ("data", "indices", "indptr"))
+    acc = np.zeros(index_docs, dtype=retriever.dtype)
+
+    # bm25s adds a term once per occurrence in the query, so weight by the count
+    terms, counts = np.unique(np.asarray(token_ids, dtype=np.int64), return_counts=True)
+    ceilings = term_max[terms] * counts
+    order = np.argsort(-ceilings, kind="stable")
+    terms, counts = terms[order].tolist(), counts[order].tolist()
+    rest = np.append(np.cumsum(ceilings[order][::-1])[::-1], 0)[1:]  # ceilings after term i
+
+    total = float(ceilings.sum())
+    candidates = None
+    seen: List[np.ndarray] = []  # posting doc ids added so far
+    n_seen = 0
+    for t, c, rest_i in zip(terms, counts, rest.tolist()):
+        start, end = int(indptr[t]), int(indptr[t + 1])
+        docs_t, vals_t = indices[start:end], data[start:end]
+        if c != 1:
+            vals_t = vals_t * c
+        if candidates is None:
+            acc[docs_t] += vals_t  # doc ids are unique within a posting list
+            seen.append(docs_t)
+            n_seen += end - start
+            # kth <= ceilings added so far, so only look once that can beat the rest
+            if total - rest_i > rest_i:
+                # untouched docs are at 0 and can't beat kth > rest_i >= 0 anyway
+                if n_seen < len(acc) // 16:
+                    touched = np.unique(np.concatenate(seen))
+                else:
+                    touched = np.flatnonzero(acc)
+                seen, n_seen = [touched], len(touched)
+                if len(touched) >= k:
+                    kth = np.partition(acc[touched], -k)[-k]
+                    if kth > rest_i:
+                        candidates = touched[acc[touched] + rest_i >= kth]
+        else:
+            if end > start:
+                pos = np.minimum(np.searchsorted(docs_t, candidates), end - start - 1)
+                found = docs_t[pos] == candidates
+                acc[candidates[found]] += vals_t[pos[found]]
+            kth = np.partition(acc[candidates], -k)[-k]
+            candidates = candidates[acc[candidates] + rest_i >= kth]
+
+    pool = acc if candidates is None else acc[candidates]
+    top = np.argpartition(-pool, k - 1)[:k]
+    top = top[np.argsort(-pool[top], kind="stable")]
+    scores = pool[top]
+    if retriever.nonoccurrence_array is not None:  # BM25L / BM25+ constant offset
+        scores = scores + retriever.nonoccurrence_array[np.asarray(token_ids, dtype=np.int64)].sum()
+    return (top if candidates is None else candidates[top]), scores
+
+
+def retrieve_batch(q_tokens: List[List[str]], k: int):
+    """Score all queries in one bm25s pass; returns (docs, scores) of shape (B, k)."""
+    if USE_MAXSCORE and k <= index_docs // 10:
+        rows = [retrieve_maxscore(retriever.get_tokens_ids(q), k) for q in q_tokens]
+        return np.stack([d for d, _ in rows]), np.stack([sc for _, sc in rows])
+    return retriever.retrieve(
+        q_tokens,
+        k=k,
+        n_threads=0,
+        backend_selection=BACKEND_SELECTION,
+        show_progress=False,
+    )
+
+
+# One shared Tokenizer that only splits (its regex is compiled once); stopwords are
+# removed afterwards against a frozenset resolved once per setting. bm25s itself would
+# rebuild its stopword set on every call.
+_splitter = Tokenizer(stopwords=None, stemmer=None)
+STOP: Dict[Optional[str], FrozenSet[str]] = {}
+
+
+def stopword_set(sw: Optional[str]) -> FrozenSet[str]:
+    s = STOP.get(sw)
+    if s is None:
+        s = STOP[sw] = frozenset(Tokenizer(stopwords=sw).stopwords)  # "de" -> German list
+    return s
+
+
+def _filter(tokens: List[str], sw: Optional[str]) -> List[str]:
+    s = stopword_set(sw)
+    return [t for t in tokens if t not in s] if s else tokens
+
+
+@lru_cache(maxsize=TOKEN_CACHE_SIZE)
+def _tok(query: str, sw: Optional[str]) -> Tuple[str, ...]:
+    # allow_empty=False: a query without word tokens gives [] like bm25s.tokenize, not [""]
+    # ("" maps past the end of indptr in a standard index and would fail scoring)
+    tokens = _splitter.tokenize(
+        [query], update_vocab=True, return_as="string", show_progress=False, allow_empty=False
+    )[0]
+    # decode() walks the whole vocab, so keep it query-local instead of letting it
+    # accumulate every word ever searched for
+    _splitter.reset_vocab()
+    # tuple, so a cached entry can't be mutated by a caller
+    return tuple(_filter(tokens, sw))
+
+
+def tokenize(queries: List[str], sw: Optional[str]) -> List[List[str]]:
+    return [list(_tok(q, sw)) for q in queries]
+
+
+def _hit(di: int, score: float) -> Dict[str, Any]:
+    name, description, doc_facts, extra = (
+        meta_record(di) if 0 <= di < n_docs else (None, None, [], {})
+    )
+    return {
+        "doc_index": di,          # raw index ID from BM25
+        "score": score,           # raw score
+        "entity_name": name,
+        "description": description,
+        "facts": doc_facts,
+        "extra": extra,           # remaining raw meta keys
+    }
+
+
+def build_hits(docs, scores) -> List[Dict[str, Any]]:
+    # .tolist() converts in one C loop, so the Python loop sees native ints/floats
+    return [_hit(di, score) for di, score in zip(docs.tolist(), scores.tolist())]
+
+
+def encode_search(query: str, topk: int, sw: Optional[str], docs, scores) -> bytes:
+    """/search response body, encoded hit by hit without a list of hit dicts."""
+    buf = bytearray(orjson.dumps({"query": query, "topk": topk, "stopwords": sw}))
+    buf[-1:] = b',"results":['  # reopen the object in place of its closing brace
+    for i, (di, score) in enumerate(zip(docs.tolist(), scores.tolist())):
+        if i:
+            buf += b","
+        buf += orjson.dumps(_hit(di, score))
+    buf += b"]}"
+    return bytes(buf)
+
+
+def _warmup() -> None:
+    """Run the /search path a few times so JIT compilation, thread-pool setup and first-call
+    specialization happen at startup (once, in the parent under --preload) instead of on
+    the first user request."""
+    if not index_docs:
+        return
+    # __wrapped__: tokenize for real without putting the warm-up query into the cache
+    q_tokens = [list(_tok.__wrapped__("aventurien horas magier krieger", DEFAULT_STOPWORDS))]
+    k = min(10, index_docs)
+    for _ in range(3):
+        docs, scores = retrieve_batch(q_tokens, k)
+        encode_search("", k, DEFAULT_STOPWORDS, docs[0], scores[0])
+
+
+_warmup()
+
+
+# Encoded /search bodies + ETags by (query, topk, stopwords); only touched from the event loop.
+# Sized in body bytes, since a large-topk body can be megabytes.
+_responses: TTLCache = TTLCache(
+    maxsize=int(RESPONSE_CACHE_MB * 1024 * 1024),
+    ttl=RESPONSE_CACHE_TTL,
+    getsizeof=lambda v: len(v[0]),
+)
+# Bigger bodies aren't cached: each would evict many typical small responses
+RESPONSE_CACHE_MAX_BODY = _responses.maxsize // 16
+
+# Pending single-query /search calls: (tokens, topk, future)
+_queue: Optional[asyncio.Queue] = None
+# One slot per EXEC worker, held by every EXEC job (coalesced /search batches and
+# /search_batch alike); while all are busy, /search calls queue up into the next batch
+_slots: Optional[asyncio.Semaphore] = None
+_inflight: set = set()
+
+
+async def _score(batch) -> None:
+    # Scores are sorted, so the top-k of a smaller k is a prefix of the max k.
+    k = max(topk for _, topk, _ in batch)
+    docs, scores = await asyncio.get_running_loop().run_in_executor(
+        EXEC, retrieve_batch, [tokens for tokens, _, _ in batch], k
+    )
+    for row, (_, topk, fut) in enumerate(batch):
+        if not fut.done():
+            fut.set_result((docs[row, :topk], scores[row, :topk]))
+
+
+async def _run_batch(batch) -> None:
+    try:
+        try:
+            await _score(batch)
+        except Exception as e:
+            if len(batch) == 1:
+                _fail(batch[0], e)
+                return
+            # One bad query must not fail the others coalesced with it: retry one by one
+            for item in batch:
+                try:
+                    await _score([item])
+                except Exception as e_item:
+                    _fail(item, e_item)
+    finally:
+        _slots.release()
+
+
+def _fail(item, e: Exception) -> None:
+    fut = item[2]
+    if not fut.done():
+        fut.set_exception(e)
+
+
+async def _coalesce():
+    """Collect waiting /search calls into batches and score each batch at once.
+
+    A free executor slot takes whatever is queued right away, so an idle server never
+    delays a request; batches only grow while all slots are busy. The slot is taken only
+    once a call is waiting, so an idle coalescer doesn't hold one back from /search_batch.
+    """
+    while True:
+        batch = [await _queue.get()]
+        await _slots.acquire()
+        while len(batch) < MAX_BATCH and not _queue.empty():
+            batch.append(_queue.get_nowait())
+
+        task = asyncio.create_task(_run_batch(batch))
+        _inflight.add(task)
+        task.add_done_callback(_inflight.discard)
+
+
+class OrjsonResponse(Response):
+    """JSON response encoded with orjson (much faster than json for /search_batch hits)."""
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Created per worker inside its event loop (after the fork under --preload)
+    global _queue, _slots
+    _queue = asyncio.Queue()
+    _slots = asyncio.Semaphore(EXEC_WORKERS)
+    coalescer = asyncio.create_task(_coalesce())
+    yield
+    coalescer.cancel()
+
+
+app = FastAPI(
+    title="DSA BM25 API",
+    version="1.0.0",
+    default_response_class=OrjsonResponse,
+    lifespan=lifespan,
+)
+# Hits are long, repetitive German prose: gzip shrinks them several-fold on the wire.
+# Level 4 gets most of the ratio for a fraction of the CPU of level 9.
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=4)
 
 
 class SearchRequest(BaseModel):
     query: str
-    topk: int = 10
+    topk: int = Field(default=10, ge=1, le=MAX_TOPK)
+    stopwords: Optional[str] = None  # e.g., "de"
+
+
+class BatchSearchRequest(BaseModel):
+    queries: List[str] = Field(max_length=MAX_QUERIES)
+    topk: int = Field(default=10, ge=1, le=MAX_TOPK)
     stopwords: Optional[str] = None  # e.g., "de"
 
 
@@ -83,32 +591,79 @@ def health():
     return {
         "status": "ok",
         "index_dir": str(index_path),
-        "meta_docs": len(metas),
+        "index_docs": index_docs,
+        "meta_docs": n_docs,
+        "meta_store": "mmap" if META_MMAP else "memory",
         "default_stopwords": DEFAULT_STOPWORDS,
     }
 
 
+@app.post("/cache_clear")
+async def cache_clear():
+    cleared = _tok.cache_info().currsize
+    _tok.cache_clear()
+    responses_cleared = len(_responses)  # entries, not bytes
+    _responses.clear()
+    return {
+        "status": "ok",
+        "token_cache_cleared": cleared,
+        "response_cache_cleared": responses_cleared,
+    }
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """Weak comparison (RFC 9110 8.8.3.2): W/ prefixes are ignored on both sides.
+
+    Only real entity tags are compared; "*" never yields a 304 here."""
+    opaque = etag.removeprefix("W/")
+    return any(t.strip().removeprefix("W/") == opaque for t in if_none_match.split(","))
+
+
 @app.post("/search")
-def search(req: SearchRequest):
+async def search(req: SearchRequest, request: Request):
     try:
         sw = req.stopwords if req.stopwords is not None else DEFAULT_STOPWORDS
-        q_tokens = bm25s.tokenize(req.query, stopwords=sw)
-        docs, scores = retriever.retrieve(q_tokens, k=req.topk)  # shapes: (1, k)
+        key = (req.query, req.topk, sw)
+        cached = _responses.get(key)
+        if cached is None:
+            q_tokens = tokenize([req.query], sw)[0]
+            k = min(req.topk, index_docs)
+            fut = asyncio.get_running_loop().create_future()
+            await _queue.put((q_tokens, k, fut))
+            docs, scores = await fut  # shapes: (k,)
+
+            # Already-encoded bytes, so FastAPI doesn't serialize the hits a second time
+            body = encode_search(req.query, req.topk, sw, docs, scores)
+            # Weak: GZipMiddleware may re-encode the body, so bytes on the wire vary
+            etag = 'W/"%s"' % hashlib.blake2b(body, digest_size=8).hexdigest()
+            cached = (body, etag)
+            if len(body) <= RESPONSE_CACHE_MAX_BODY:
+                _responses[key] = cached
 
+        body, etag = cached
+        # 304 on POST is a deliberate extension; see the module docstring
+        if _etag_matches(request.headers.get("if-none-match", ""), etag):
+            # Vary like the (possibly gzipped) 200 this stands in for
+            return Response(status_code=304, headers={"ETag": etag, "Vary": "Accept-Encoding"})
+        return Response(content=body, media_type="application/json", headers={"ETag": etag})
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/search_batch")
+async def search_batch(req: BatchSearchRequest):
+    try:
+        sw = req.stopwords if req.stopwords is not None else DEFAULT_STOPWORDS
         results: List[Dict[str, Any]] = []
-        for doc_idx, score in zip(docs[0], scores[0]):
-            di = int(doc_idx)
-            meta = metas[di] if 0 <= di < len(metas) else {}
-            results.append(
-                {
-                    "doc_index": di,          # raw index ID from BM25
-                    "score": float(score),    # raw score
-                    "meta": meta,             # raw meta doc (no formatting)
-                }
-            )
+        if req.queries:
+            async with _slots:
+                docs, scores = await asyncio.get_running_loop().run_in_executor(
+                    EXEC, retrieve_batch, tokenize(req.queries, sw), min(req.topk, index_docs)
+                )  # shapes: (B, k)
+            for row, query in enumerate(req.queries):
+                results.append({"query": query, "results": build_hits(docs[row], scores[row])})
 
         return {
-            "query": req.query,
             "topk": req.topk,
             "stopwords": sw,
             "results": results,
@@ -119,4 +674,4 @@ def search(req: SearchRequest):
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=PORT)
+    uvicorn.run(app, host="0.0.0.0", port=PORT, access_log=False)
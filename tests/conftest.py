@@ -0,0 +1,51 @@
+"""Builds a small BM25S index + meta.jsonl and imports the server against it.
+
+dsa_bm25_server loads its index at import time, so the environment has to be set up
+before the first import; the `server` fixture does that once per session.
+"""
+
+import importlib
+import os
+import sys
+from pathlib import Path
+
+import bm25s
+import numpy as np
+import orjson
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+N_DOCS = 2000
+VOCAB = [f"w{i}" for i in range(400)]
+
+
+def _corpus(n_docs: int) -> list:
+    # Zipf-like term frequencies, so posting lengths (and score ceilings) vary widely
+    rng = np.random.default_rng(0)
+    p = 1.0 / np.arange(1, len(VOCAB) + 1)
+    p /= p.sum()
+    return [
+        " ".join(rng.choice(VOCAB, size=int(rng.integers(3, 40)), p=p))
+        for _ in range(n_docs)
+    ]
+
+
+@pytest.fixture(scope="session")
+def corpus() -> list:
+    return _corpus(N_DOCS)
+
+
+@pytest.fixture(scope="session")
+def server(tmp_path_factory, corpus):
+    index_dir = tmp_path_factory.mktemp("bm25_index")
+    retriever = bm25s.BM25()
+    retriever.index(bm25s.tokenize(corpus, stopwords=None, show_progress=False), show_progress=False)
+    retriever.save(str(index_dir))
+    with (index_dir / "meta.jsonl").open("wb") as f:
+        for i, text in enumerate(corpus):
+            f.write(orjson.dumps({"doc_id": i, "entity_name": f"doc{i}", "description": text}) + b"\n")
+
+    os.environ["INDEX_DIR"] = str(index_dir)
+    os.environ["MAXSCORE"] = "1"  # builds the term ceilings retrieve_maxscore needs
+    return importlib.import_module("dsa_bm25_server")
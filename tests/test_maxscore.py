@@ -0,0 +1,33 @@
+"""retrieve_maxscore must return the same top-k scores as plain bm25s retrieval."""
+
+import numpy as np
+import pytest
+
+from conftest import VOCAB
+
+
+def _queries() -> list:
+    rng = np.random.default_rng(1)
+    queries = [[], ["oov"], ["w0", "oov"], ["w0"], ["w399"]]
+    for _ in range(100):  # multi-term, mixing frequent and rare terms
+        queries.append(list(rng.choice(VOCAB, size=int(rng.integers(2, 8)))))
+    for _ in range(50):  # repeated terms weigh once per occurrence
+        terms = list(rng.choice(VOCAB, size=int(rng.integers(1, 4))))
+        queries.append(terms + list(rng.choice(terms, size=int(rng.integers(1, 4)))))
+    return queries
+
+
+@pytest.mark.parametrize("k", [1, 5, 10, 50, 200])
+def test_maxscore_matches_bm25s(server, k):
+    retriever = server.retriever
+    for q in _queries():
+        docs, scores = server.retrieve_maxscore(retriever.get_tokens_ids(q), k)
+        ref_docs, ref_scores = retriever.retrieve([q], k=k, n_threads=0, show_progress=False)
+        np.testing.assert_allclose(scores, ref_scores[0], rtol=1e-5, atol=1e-6, err_msg=str(q))
+        # doc ids may differ only among tied scores; each must score what it claims
+        assert len(set(docs.tolist())) == k
+        full = np.zeros(retriever.scores["num_docs"])
+        for t in retriever.get_tokens_ids(q):
+            start, end = retriever.scores["indptr"][t], retriever.scores["indptr"][t + 1]
+            full[retriever.scores["indices"][start:end]] += retriever.scores["data"][start:end]
+        np.testing.assert_allclose(full[docs], scores, rtol=1e-5, atol=1e-6, err_msg=str(q))
@@ -0,0 +1,21 @@
+"""The index is built with bm25s.tokenize, so the server's query tokens must match it."""
+
+import bm25s
+import pytest
+
+
+@pytest.mark.parametrize(
+    "query, stopwords",
+    [
+        ("", None),
+        ("  ", None),
+        ("?", None),
+        ("a b c", "de"),
+        ("und der", "de"),
+        ("Horasischer Adel und Titel", "de"),
+        ("Rondra-Geweihte in Arivor", None),
+    ],
+)
+def test_tok_matches_bm25s_tokenize(server, query, stopwords):
+    expected = bm25s.tokenize(query, stopwords=stopwords, return_ids=False, show_progress=False)[0]
+    assert list(server._tok.__wrapped__(query, stopwords)) == expected